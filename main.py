@@ -1,14 +1,19 @@
-from fastapi import FastAPI, HTTPException, status, Depends
-from pydantic import BaseModel, Field
+import threading
+from cachetools import TTLCache
+from fastapi import Body, FastAPI, HTTPException, Query, Response, status, Depends
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, Field, TypeAdapter
 from typing import List, Optional
-from sqlalchemy import create_engine, Column, Integer, String
+from sqlalchemy import create_engine, event, bindparam, delete, func, insert, select, Column, Index, Integer, String
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.pool import QueuePool
 
 app = FastAPI(
     title="REST API Example",
     description="REST API example with SQLite persistence",
-    version="1.0"
+    version="1.0",
+    default_response_class=ORJSONResponse # orjson serializes much faster than stdlib json
 )
 
 # --- SQLAlchemy Setup ---
@@ -16,7 +21,27 @@ app = FastAPI(
 SQLALCHEMY_DATABASE_URL = "sqlite:///./hotels.db"
 
 # Create the database engine
-engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+# A fixed-size pool keeps SQLite connections (and their PRAGMA setup) warm
+# across requests and bounds connection growth under bursty load
+engine = create_engine(
+    SQLALCHEMY_DATABASE_URL,
+    connect_args={"check_same_thread": False},
+    poolclass=QueuePool,
+    pool_size=20,
+    max_overflow=10
+)
+
+# Tune every new SQLite connection: WAL lets readers run alongside the writer,
+# and synchronous=NORMAL avoids an fsync on every commit (safe in WAL mode)
+@event.listens_for(engine, "connect")
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA temp_store=memory")
+    cursor.execute("PRAGMA cache_size=-64000") # 64 MB page cache
+    cursor.execute("PRAGMA mmap_size=268435456") # 256 MB memory-mapped I/O
+    cursor.close()
 
 # Create a local session
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -29,14 +54,41 @@ class HotelDB(Base):
     __tablename__ = "hotels"
 
     id = Column(Integer, primary_key=True, index=True)
-    city = Column(String, index=True, nullable=False)
+    city = Column(String, nullable=False) # Covered by ix_hotels_city_rating
     description = Column(String, nullable=False)
     name = Column(String, index=True, nullable=False)
     rating = Column(Integer, nullable=False) # Validation handled by Pydantic model
 
+    # Composite index so "hotels in a city filtered/sorted by rating" is served
+    # by a single B-tree walk instead of a scan plus temp sort
+    __table_args__ = (Index("ix_hotels_city_rating", "city", "rating"),)
+
 # Create tables in the database (if they don't exist)
 Base.metadata.create_all(bind=engine)
 
+# --- Prebuilt SQL statements ---
+# Built once at import time and executed with bound parameters, so requests
+# skip Query construction and hit SQLAlchemy's compiled statement cache
+_stmt_get = select(HotelDB).where(HotelDB.id == bindparam("id"))
+_stmt_after = (
+    select(HotelDB)
+    .where(HotelDB.id > bindparam("after_id"))
+    .order_by(HotelDB.id)
+    .limit(bindparam("lim"))
+)
+_stmt_page_ids = (
+    select(HotelDB.id)
+    .order_by(HotelDB.id)
+    .limit(bindparam("lim"))
+    .offset(bindparam("off"))
+)
+_stmt_by_ids = (
+    select(HotelDB)
+    .where(HotelDB.id.in_(bindparam("ids", expanding=True)))
+    .order_by(HotelDB.id)
+)
+_stmt_count = select(func.count()).select_from(HotelDB)
+
 # --- Pydantic Models (for request/response validation) ---
 class HotelBase(BaseModel):
     city: str
@@ -61,16 +113,56 @@ class Hotel(HotelBase):
 class PaginatedResponse(BaseModel):
     content: List[Hotel]
     last: bool
-    totalElements: int
-    totalPages: int
+    totalElements: Optional[int] = None # Omitted for cursor-based requests
+    totalPages: Optional[int] = None
     size: int
     number: int
     sort: Optional[str] = None # Sorting can be a string or None
     numberOfElements: int
     first: bool
+    nextCursor: Optional[int] = None # Pass as after_id to fetch the next page
+
+class BulkCreateResponse(BaseModel):
+    created: int # Number of hotels inserted
+
+# Validates a whole list of ORM rows in one call into pydantic-core
+HotelList = TypeAdapter(List[Hotel])
+
+# --- Response caches ---
+# Serialized GET payloads, keyed by hotel id and by list query parameters.
+# Write endpoints invalidate them; the TTL bounds staleness from concurrent
+# readers that repopulate an entry while a write is being committed.
+hotel_cache = TTLCache(maxsize=10_000, ttl=30)
+hotel_page_cache = TTLCache(maxsize=1_000, ttl=30)
+cache_lock = threading.Lock() # cachetools caches are not thread-safe
+
+def invalidate_hotel_cache(id: Optional[int] = None):
+    """Drop cached entries affected by a write (every list page, and hotel `id`)."""
+    with cache_lock:
+        if id is not None:
+            hotel_cache.pop(id, None)
+        hotel_page_cache.clear()
+
+# --- Hotel count ---
+# Kept in memory so list pages can report totals without scanning the table.
+# Counted once at startup and adjusted by the write endpoints; this assumes a
+# single worker process owns the database.
+with engine.connect() as connection:
+    hotel_total = connection.scalar(_stmt_count)
+total_lock = threading.Lock()
+
+def adjust_hotel_total(delta: int):
+    """Add `delta` to the in-memory hotel count after a committed write."""
+    global hotel_total
+    with total_lock:
+        hotel_total += delta
 
 # --- Dependency to get the database session ---
-def get_db():
+# Declared async so FastAPI runs it on the event loop instead of entering and
+# exiting it through the threadpool. Neither step waits on I/O: the session
+# connects lazily inside the endpoint, and close() only returns the
+# connection to the pool.
+async def get_db():
     db = SessionLocal()
     try:
         yield db
@@ -78,39 +170,72 @@ def get_db():
         db.close()
 
 # --- Endpoints ---
-@app.get("/api/v1/hotels", response_model=PaginatedResponse, tags=["Hotel Controller"],
-         summary="Get a paginated list of all hotels.")
-async def get_all_hotels(
-    page: int = 0,
-    size: int = 100,
+# Read endpoints return an ORJSONResponse built from an already validated model,
+# so FastAPI skips revalidating it against a response_model. The schema is
+# still documented in OpenAPI through `responses`.
+@app.get("/api/v1/hotels", response_model=None, responses={200: {"model": PaginatedResponse}},
+         tags=["Hotel Controller"], summary="Get a paginated list of all hotels.")
+def get_all_hotels(
+    page: int = Query(0, ge=0),
+    size: int = Query(100, gt=0, le=1000), # Maximum page size is 1000
     sort: Optional[str] = None, # Sorting not implemented in this example
+    after_id: Optional[int] = None, # Cursor: id of the last hotel of the previous page
     db: Session = Depends(get_db)
 ):
-    """Get a paginated list of all hotels."""
-    # Validate pagination parameters
-    if page < 0:
-        page = 0
-    if size <= 0:
-        size = 100 # Or raise an HTTPException
-    if size > 1000: # Set a maximum limit
-        size = 1000
+    """Get a paginated list of all hotels.
+
+    With `after_id`, `page` is ignored: the response reports `number=0` and
+    `first` is true only for `after_id <= 0`.
+    """
+    if after_id is not None:
+        page = 0 # Cursor pages have no page number; keep it out of the cache key
+    cache_key = (page, size, sort, after_id)
+    with cache_lock:
+        cached = hotel_page_cache.get(cache_key)
+    if cached is not None:
+        return ORJSONResponse(content=cached)
+
+    if after_id is not None:
+        # Keyset pagination: seek past the cursor on the primary key index
+        # and fetch one extra row to know whether another page follows.
+        # No COUNT(*) and no OFFSET, so the cost does not grow with depth.
+        hotels_list_db = db.scalars(_stmt_after, {"after_id": after_id, "lim": size + 1}).all()
+        is_last = len(hotels_list_db) <= size
+        hotels_list = HotelList.validate_python(hotels_list_db[:size], from_attributes=True)
+
+        response = PaginatedResponse(
+            content=hotels_list,
+            last=is_last,
+            size=size,
+            number=0,
+            sort=sort,
+            numberOfElements=len(hotels_list),
+            first=(after_id <= 0), # Ids start at 1, so after_id=0 is the first page
+            nextCursor=None if is_last else hotels_list[-1].id
+        ).model_dump()
+        with cache_lock:
+            hotel_page_cache[cache_key] = response
+        return ORJSONResponse(content=response)
 
     offset = page * size
 
-    # Get total count
-    total = db.query(HotelDB).count()
+    # Get paginated results with a deferred join: walk only the primary key
+    # index to skip the first `offset` rows, then load full rows for the page
+    page_ids = db.scalars(_stmt_page_ids, {"lim": size, "off": offset}).all()
+    total = hotel_total
 
-    # Get paginated results
-    hotels_list_db = db.query(HotelDB).offset(offset).limit(size).all()
+    hotels_list_db = []
+    if page_ids:
+        hotels_list_db = db.scalars(_stmt_by_ids, {"ids": page_ids}).all()
 
     # Convert SQLAlchemy objects to Pydantic models
-    hotels_list = [Hotel.model_validate(h) for h in hotels_list_db]
+    hotels_list = HotelList.validate_python(hotels_list_db, from_attributes=True)
 
     total_pages = (total + size - 1) // size if size > 0 else 0
     is_last = (offset + len(hotels_list) >= total)
     is_first = (page == 0)
 
-    return PaginatedResponse(
+    response = PaginatedResponse(
         content=hotels_list,
         last=is_last,
         totalElements=total,
@@ -119,66 +244,108 @@ async def get_all_hotels(
         number=page,
         sort=sort,
         numberOfElements=len(hotels_list),
-        first=is_first
-    )
+        first=is_first,
+        nextCursor=hotels_list[-1].id if hotels_list and not is_last else None
+    ).model_dump()
+    with cache_lock:
+        hotel_page_cache[cache_key] = response
+    return ORJSONResponse(content=response)
 
 @app.post("/api/v1/hotels", response_model=Hotel, status_code=status.HTTP_201_CREATED,
           tags=["Hotel Controller"], summary="Create a hotel resource.")
-async def create_hotel(hotel: HotelCreate, db: Session = Depends(get_db)):
+def create_hotel(hotel: HotelCreate, db: Session = Depends(get_db)):
     """Create a hotel resource."""
-    # Create SQLAlchemy object
-    db_hotel = HotelDB(**hotel.dict())
-    db.add(db_hotel)
-    db.commit()
-    db.refresh(db_hotel) # Refresh to get the ID from the database
-    # Return Pydantic model
-    return Hotel.model_validate(db_hotel)
-
-@app.get("/api/v1/hotels/{id}", response_model=Hotel, tags=["Hotel Controller"],
-         summary="Get a single hotel.")
-async def get_hotel_by_id(id: int, db: Session = Depends(get_db)):
+    with db.begin(): # Commit once on exit, roll back on error
+        # Create SQLAlchemy object
+        db_hotel = HotelDB(**hotel.model_dump())
+        db.add(db_hotel)
+        db.flush() # Flush to get the ID from the database
+        # Build the Pydantic model before commit expires the attributes
+        created = Hotel.model_validate(db_hotel)
+    adjust_hotel_total(1) # flush raises unless exactly one row was inserted
+    invalidate_hotel_cache()
+    return created
+
+@app.post("/api/v1/hotels/bulk", response_model=BulkCreateResponse, status_code=status.HTTP_201_CREATED,
+          tags=["Hotel Controller"], summary="Create several hotel resources at once.")
+def bulk_create_hotels(
+    hotels: List[HotelCreate] = Body(..., max_length=1000), # Same cap as the list page size
+    db: Session = Depends(get_db)
+):
+    """Create several hotel resources at once."""
+    if not hotels:
+        return BulkCreateResponse(created=0)
+    # A Core INSERT without RETURNING runs as a single executemany: one
+    # prepared statement and one commit for the whole batch
+    with db.begin():
+        result = db.execute(
+            insert(HotelDB.__table__),
+            [hotel.model_dump() for hotel in hotels]
+        )
+    adjust_hotel_total(result.rowcount)
+    invalidate_hotel_cache()
+    return BulkCreateResponse(created=result.rowcount)
+
+@app.get("/api/v1/hotels/{id}", response_model=None, responses={200: {"model": Hotel}},
+         tags=["Hotel Controller"], summary="Get a single hotel.")
+def get_hotel_by_id(id: int, db: Session = Depends(get_db)):
     """Get a single hotel."""
-    db_hotel = db.query(HotelDB).filter(HotelDB.id == id).first()
+    with cache_lock:
+        cached = hotel_cache.get(id)
+    if cached is not None:
+        return ORJSONResponse(content=cached)
+
+    db_hotel = db.scalars(_stmt_get, {"id": id}).one_or_none()
     if db_hotel is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Hotel with id {id} not found"
         )
-    return Hotel.model_validate(db_hotel)
+    response = Hotel.model_validate(db_hotel).model_dump()
+    with cache_lock:
+        hotel_cache[id] = response
+    return ORJSONResponse(content=response)
 
 @app.put("/api/v1/hotels/{id}", response_model=Hotel, tags=["Hotel Controller"],
          summary="Update a hotel resource.")
-async def update_hotel(id: int, hotel_update: HotelUpdate, db: Session = Depends(get_db)):
+def update_hotel(id: int, hotel_update: HotelUpdate, db: Session = Depends(get_db)):
     """Update a hotel resource."""
-    db_hotel = db.query(HotelDB).filter(HotelDB.id == id).first()
-    if db_hotel is None:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Hotel with id {id} not found"
-        )
+    # Lookup and update share one transaction, committed once on exit
+    with db.begin():
+        db_hotel = db.get(HotelDB, id)
+        if db_hotel is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Hotel with id {id} not found"
+            )
 
-    # Convert updates to a dictionary, excluding unset fields
-    update_data = hotel_update.dict(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(db_hotel, field, value)
+        # Convert updates to a dictionary, excluding unset fields
+        update_data = hotel_update.model_dump(exclude_unset=True)
+        for field, value in update_data.items():
+            setattr(db_hotel, field, value)
 
-    db.commit()
-    db.refresh(db_hotel)
-    return Hotel.model_validate(db_hotel)
+        db.flush()
+        updated = Hotel.model_validate(db_hotel)
+    invalidate_hotel_cache(id)
+    return updated
 
-@app.delete("/api/v1/hotels/{id}", status_code=status.HTTP_204_NO_CONTENT,
+@app.delete("/api/v1/hotels/{id}", status_code=status.HTTP_204_NO_CONTENT, response_class=Response,
             tags=["Hotel Controller"], summary="Delete a hotel resource.")
-async def delete_hotel(id: int, db: Session = Depends(get_db)):
+def delete_hotel(id: int, db: Session = Depends(get_db)):
     """Delete a hotel resource."""
-    db_hotel = db.query(HotelDB).filter(HotelDB.id == id).first()
-    if db_hotel is None:
+    # Decide on the DELETE's own rowcount rather than a prior lookup: two
+    # concurrent deletes can both see the row, but only one removes it
+    with db.begin():
+        deleted = db.execute(delete(HotelDB).where(HotelDB.id == id)).rowcount
+    if deleted == 0:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Hotel with id {id} not found"
         )
-    db.delete(db_hotel)
-    db.commit()
-    return # Return empty response (204)
+    adjust_hotel_total(-deleted)
+    invalidate_hotel_cache(id)
+    # Return the empty 204 directly, bypassing response serialization
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
 
 if __name__ == "__main__":
     import uvicorn